@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import cross_val_score, TimeSeriesSplit
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv, parquet as pq
+except ImportError:  # # optional, pandas is used instead
+    pa = None
+
+# column_names and include_columns of pyarrow.csv first appeared in 0.15
+if pa is not None and tuple(int(v) for v in pa.__version__.split('.')[:2]) < (0, 15):
+    pa = None
+
+
+def cache_path(file_path, test_size, name):
+    """
+    Locates cached data of a dataset. Cache is keyed by dataset's path,
+    modification time and test_size, so it is never stale.
+    :param file_path: path to processed dataset
+    :param test_size: last test_size hours will be treated as test set
+    :param name: file name of cached data, e.g. 'folds_10.npz'
+    :return: path of cache file
+    """
+    key = hashlib.md5(('%s:%s:%d' % (os.path.abspath(file_path),
+                                     os.path.getmtime(file_path),
+                                     test_size)).encode()).hexdigest()
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), '.cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, '%s_%s' % (key, name))
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """
+    Opens a temporary file next to path, and moves it to path once written.
+    An interrupted write leaves no file at path, so readers of the cache
+    never see a truncated file.
+    :param path: destination of the file
+    :return: binary file object to write to
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def read_dated_series(file_path, test_size):
+    """
+    Reads processed dataset as a Series of requests indexed by datetime.
+    :param file_path: path to processed dataset
+    :param test_size: last test_size hours will be treated as test set,
+                    keys the parquet cache (pyarrow only)
+    :return: pandas Series of requests
+    """
+    if pa is None:
+        series = pd.read_csv(
+            file_path,
+            header=None,  # contains no header
+            index_col=0,  # set datetime column as index
+            names=['datetime', 'requests'],  # name the columns
+            squeeze=True,  # convert to Series
+            dtype={'requests': np.float64},  # https://git.io/vdbyk
+        )
+        # parse whole column at once instead of calling a converter per row
+        series.index = pd.to_datetime(series.index, format='%Y-%m-%d %H:%M:%S')
+        return series
+
+    cache = cache_path(file_path, test_size, 'datetime_requests.parquet')
+    if os.path.exists(cache):
+        table = pq.read_table(cache)
+    else:
+        table = pacsv.read_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(column_names=['datetime', 'requests']),
+            convert_options=pacsv.ConvertOptions(column_types={
+                'datetime': pa.timestamp('s'),
+                'requests': pa.float64(),
+            }),
+        )
+        with atomic_write(cache) as f:
+            pq.write_table(table, f)
+    return table.to_pandas().set_index('datetime')['requests']
+
+
+def read_series(file_path, test_size):
+    """
+    Reads requests column of processed dataset as a Series.
+    Datetime column is skipped, for callers using positions only.
+    :param file_path: path to processed dataset
+    :param test_size: last test_size hours will be treated as test set,
+                    keys the parquet cache (pyarrow only)
+    :return: pandas Series of requests
+    """
+    if pa is None:
+        # Count rows first, then stream chunks into a preallocated array,
+        # so that peak memory stays close to the size of the series itself
+        with open(file_path, 'rb') as f:
+            nrows = sum(1 for _ in f)
+        values = np.empty(nrows, dtype=np.float64)
+        offset = 0
+        for chunk in pd.read_csv(
+                file_path,
+                header=None,  # contains no header
+                names=['datetime', 'requests'],  # name the columns
+                usecols=['requests'],  # datetime is never used
+                dtype={'requests': np.float64},  # https://git.io/vdbyk
+                chunksize=1000000,  # rows parsed at a time
+        ):
+            values[offset:offset + len(chunk)] = chunk['requests'].values
+            offset += len(chunk)
+        # blank lines are counted but not parsed
+        return pd.Series(values[:offset], name='requests')
+
+    cache = cache_path(file_path, test_size, 'requests.parquet')
+    if os.path.exists(cache):
+        table = pq.read_table(cache)
+    else:
+        table = pacsv.read_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(column_names=['datetime', 'requests']),
+            convert_options=pacsv.ConvertOptions(
+                column_types={'requests': pa.float64()},
+                include_columns=['requests'],  # datetime is never used
+            ),
+        )
+        with atomic_write(cache) as f:
+            pq.write_table(table, f)
+    return table.to_pandas()['requests']
+
+
+def score_fold(estimator, X, fold):
+    """
+    Scores an estimator on a single cross validation fold
+    :param estimator: unfitted estimator
+    :param X: pandas Series to take the fold from
+    :param fold: (train, test) indices of X
+    :return: score of the fold
+    """
+    return cross_val_score(estimator, X, cv=[fold])[0]
+
+
+def _load_series(file_path, test_size, parse_dates):
+    """
+    Loads processed dataset, reusing the parquet cache when possible.
+    Repeated loads within a process (e.g. notebooks) are served from memory
+    until the dataset is modified, so the returned Series is shared and must
+    not be modified in place.
+    :param file_path: path to processed dataset
+    :param test_size: last test_size hours will be treated as test set
+    :param parse_dates: index series by datetime, rather than by position
+    :return: pandas Series of requests
+    """
+    return _read_cached(file_path, test_size, parse_dates,
+                        os.path.getmtime(file_path))
+
+
+@functools.lru_cache(maxsize=4)
+def _read_cached(file_path, test_size, parse_dates, mtime):
+    # mtime is part of the key only, so that edited datasets are read again
+    if parse_dates:
+        return read_dated_series(file_path, test_size)
+    return read_series(file_path, test_size)
+
+
+class _BaseEnsemble:
+    # estimator of each algorithm, cheapest first
+    ESTIMATORS = dict()
+
+    # joblib backend used for folds of each candidate (loky if not listed)
+    BACKENDS = dict()
+
+    # whether estimators need the datetime index of the series
+    PARSE_DATES = False
+
+    def __init__(self, file_path, test_size=342):
+        """
+        Initializes data required by ensembles
+        :param file_path: path to processed dataset
+        :param test_size: last test_size hours will be treated as test set
+        """
+        # Save test_size
+        if test_size <= 0:
+            raise ValueError
+        self.file_path = file_path
+        self.test_size = test_size
+
+        # Read data frame
+        self.series = _load_series(file_path, test_size, self.PARSE_DATES)
+
+        self._split()
+
+    def _split(self):
+        # exclude test data
+        self.eval_series = self.series[:-self.test_size]
+        self.test_series = self.series[-self.test_size:].copy()
+
+        # be sure
+        assert len(self.test_series) == self.test_size
+        assert len(self.test_series) + len(self.eval_series) == len(self.series)
+
+    def _load_splits(self, n_splits=10):
+        """
+        Computes time series folds of eval series, or loads them from cache
+        :param n_splits: number of folds
+        :return: list of (train, test) indices of eval series
+        """
+        cache = cache_path(self.file_path, self.test_size, 'folds_%d.npz' % n_splits)
+        if os.path.exists(cache):
+            with np.load(cache) as folds:
+                return [(folds['train_%d' % k], folds['test_%d' % k])
+                        for k in range(len(folds.files) // 2)]
+
+        splits = list(TimeSeriesSplit(n_splits=n_splits).split(self.eval_series))
+        folds = dict()
+        for k, (train, test) in enumerate(splits):
+            folds['train_%d' % k] = train
+            folds['test_%d' % k] = test
+        with atomic_write(cache) as f:
+            np.savez(f, **folds)
+        return splits
+
+    def _score_candidates(self, names, splits):
+        """
+        Scores candidate algorithms concurrently on the given folds
+        :param names: names of candidate algorithms
+        :param splits: list of (train, test) indices of eval series
+        :return: dict of fold scores, keyed by algorithm name
+        """
+        scores = dict((name, np.empty(len(splits), dtype=np.float64)) for name in names)
+        if not names or not splits:
+            return scores
+
+        # Every (candidate, fold) pair is an independent task. Tasks are
+        # grouped by backend and each group goes to a single pool, always
+        # dispatched from the main thread: loky loops nested below threads
+        # would silently fall back to running sequentially
+        backends = collections.OrderedDict()
+        for name in names:
+            backends.setdefault(self.BACKENDS.get(name, 'loky'), []).append(name)
+
+        for backend, group in backends.items():
+            tasks = [(name, k) for name in group for k in range(len(splits))]
+            results = Parallel(n_jobs=-1, backend=backend, verbose=3)(
+                delayed(score_fold)(self.ESTIMATORS[name](), self.eval_series, splits[k])
+                for name, k in tasks
+            )
+            for (name, k), result in zip(tasks, results):
+                scores[name][k] = result
+        return scores
@@ -11,6 +11,10 @@ import tqdm
 from rpy2.rinterface import RRuntimeError
 from rpy2.robjects import pandas2ri
 
+# Convert pandas objects to R on the fly;
+# the conversion is global, so it is set up once at import
+pandas2ri.activate()
+
 
 class ForecastAlgorithms:
     # Try importing 'forecast' package
@@ -29,41 +33,48 @@ class ForecastAlgorithms:
     # R timeseries
     rts = robjects.r('ts')
 
-    def __init__(self, samples=500):
+    def __init__(self, samples=500, warm_start=False):
         """
         Initializes forecasting algorithms
         :param samples: clip algorithms to use at-most past 500 samples
+        :param warm_start: estimate model parameters on the first call only
+                    and re-apply them to the data of subsequent calls
         """
         # Clip
         if samples <= 0:
             raise ValueError
         self.clip = samples
 
+        # Fitted R models, kept only when warm starting
+        self.warm_start = warm_start
+        self.fits = dict()
+
     def naive_forecast(self, data, n=1):
         """
         Forecasts number of requests using naive algorithm
-        :param data: pandas Series object representing
+        :param data: pandas Series or float64 numpy array representing
                     data for already elapsed hours
         :param n: number of hours for which forecast is requested
         :return: forecasts for next n hours
         """
-        assert isinstance(data, pd.core.series.Series)
+        assert isinstance(data, (pd.core.series.Series, np.ndarray))
+        data = np.asarray(data, dtype=np.float64)  # # index is never used
 
         # The last observed value will repeat as-is
-        return np.repeat(data.values[-1], n)
+        return np.repeat(data[-1], n)
 
     def ar_forecast(self, data, n=1):
         """
         Forecasts number of requests using AR(1) model
-        :param data: pandas Series object representing
+        :param data: pandas Series or float64 numpy array representing
                     data for already elapsed hours
         :param n: number of hours for which forecast is requested
         :return: forecasts for next n hours
         """
-        assert isinstance(data, pd.core.series.Series)
+        assert isinstance(data, (pd.core.series.Series, np.ndarray))
+        data = np.asarray(data, dtype=np.float64)  # # index is never used
         assert n >= 1
 
-        pandas2ri.activate()
         results = np.array([])
 
         # series length
@@ -87,10 +98,17 @@ class ForecastAlgorithms:
             if n != 1:
                 raise ValueError
         else:
-            rdata = ForecastAlgorithms.rts(sub_series)
-            fit = ForecastAlgorithms.rforecast.Arima(rdata,
-                                                     robjects.FloatVector((1, 0, 0)),
-                                                     method="ML")
+            rdata = ForecastAlgorithms.rts(robjects.FloatVector(sub_series))
+            model = self.fits.get('ar')
+            if model is None:
+                fit = ForecastAlgorithms.rforecast.Arima(rdata,
+                                                         robjects.FloatVector((1, 0, 0)),
+                                                         method="ML")
+            else:
+                # re-apply already estimated model to the new window
+                fit = ForecastAlgorithms.rforecast.Arima(rdata, model=model)
+            if self.warm_start:
+                self.fits['ar'] = fit
             forecast = ForecastAlgorithms.rforecast.forecast(fit, h=n)
             results = np.append(results, np.asarray(forecast[3]))
 
@@ -99,15 +117,15 @@ class ForecastAlgorithms:
     def arma_forecast(self, data, n=1):
         """
         Forecasts number of requests using ARMA(1,1) model
-        :param data: pandas Series object representing
+        :param data: pandas Series or float64 numpy array representing
                     data for already elapsed hours
         :param n: number of hours for which forecast is requested
         :return: forecasts for next n hours
         """
-        assert isinstance(data, pd.core.series.Series)
+        assert isinstance(data, (pd.core.series.Series, np.ndarray))
+        data = np.asarray(data, dtype=np.float64)  # # index is never used
         assert n >= 1
 
-        pandas2ri.activate()
         results = np.array([])
 
         # series length
@@ -131,10 +149,17 @@ class ForecastAlgorithms:
             if n != 1:
                 raise ValueError
         else:
-            rdata = ForecastAlgorithms.rts(sub_series)
-            fit = ForecastAlgorithms.rforecast.Arima(rdata,
-                                                     robjects.FloatVector((1, 0, 1)),
-                                                     method="ML")
+            rdata = ForecastAlgorithms.rts(robjects.FloatVector(sub_series))
+            model = self.fits.get('arma')
+            if model is None:
+                fit = ForecastAlgorithms.rforecast.Arima(rdata,
+                                                         robjects.FloatVector((1, 0, 1)),
+                                                         method="ML")
+            else:
+                # re-apply already estimated model to the new window
+                fit = ForecastAlgorithms.rforecast.Arima(rdata, model=model)
+            if self.warm_start:
+                self.fits['arma'] = fit
             forecast = ForecastAlgorithms.rforecast.forecast(fit, h=n)
             results = np.append(results, np.asarray(forecast[3]))
 
@@ -144,15 +169,15 @@ class ForecastAlgorithms:
         """
         Forecasts number of requests using ARIMA(p,d,q) model.
         The parameters (p,d,q) are auto-tuned.
-        :param data: pandas Series object representing
+        :param data: pandas Series or float64 numpy array representing
                     data for already elapsed hours
         :param n: number of hours for which forecast is requested
         :return: forecasts for next n hours
         """
-        assert isinstance(data, pd.core.series.Series)
+        assert isinstance(data, (pd.core.series.Series, np.ndarray))
+        data = np.asarray(data, dtype=np.float64)  # # index is never used
         assert n >= 1
 
-        pandas2ri.activate()
         results = np.array([])
 
         # series length
@@ -176,8 +201,15 @@ class ForecastAlgorithms:
             if n != 1:
                 raise ValueError
         else:
-            rdata = ForecastAlgorithms.rts(sub_series)
-            fit = ForecastAlgorithms.rforecast.auto_arima(rdata)  # # auto fit
+            rdata = ForecastAlgorithms.rts(robjects.FloatVector(sub_series))
+            model = self.fits.get('arima')
+            if model is None:
+                fit = ForecastAlgorithms.rforecast.auto_arima(rdata)  # # auto fit
+            else:
+                # re-apply already estimated model to the new window
+                fit = ForecastAlgorithms.rforecast.Arima(rdata, model=model)
+            if self.warm_start:
+                self.fits['arima'] = fit
             forecast = ForecastAlgorithms.rforecast.forecast(fit, h=n)
             results = np.append(results, np.asarray(forecast[3]))
 
@@ -186,15 +218,15 @@ class ForecastAlgorithms:
     def ets_forecast(self, data, n=1):
         """
         Forecasts number of requests using ETS model.
-        :param data: pandas Series object representing
+        :param data: pandas Series or float64 numpy array representing
                     data for already elapsed hours
         :param n: number of hours for which forecast is requested
         :return: forecasts for next n hours
         """
-        assert isinstance(data, pd.core.series.Series)
+        assert isinstance(data, (pd.core.series.Series, np.ndarray))
+        data = np.asarray(data, dtype=np.float64)  # # index is never used
         assert n >= 1
 
-        pandas2ri.activate()
         results = np.array([])
 
         # series length
@@ -218,8 +250,15 @@ class ForecastAlgorithms:
             if n != 1:
                 raise ValueError
         else:
-            rdata = ForecastAlgorithms.rts(sub_series)
-            fit = ForecastAlgorithms.rforecast.ets(rdata)
+            rdata = ForecastAlgorithms.rts(robjects.FloatVector(sub_series))
+            model = self.fits.get('ets')
+            if model is None:
+                fit = ForecastAlgorithms.rforecast.ets(rdata)
+            else:
+                # re-apply already estimated model to the new window
+                fit = ForecastAlgorithms.rforecast.ets(rdata, model=model)
+            if self.warm_start:
+                self.fits['ets'] = fit
             forecast = ForecastAlgorithms.rforecast.forecast(fit, h=n)
             results = np.append(results, np.asarray(forecast[1]))
 
@@ -5,8 +5,8 @@ import collections
 import logging
 import sys
 
-import numpy as np
 import pandas as pd
+from _base import _BaseEnsemble
 from estimators import NaiveBaggingEstimator, ArBaggingEstimator, \
     ArmaBaggingEstimator, ArimaBaggingEstimator, EtsBaggingEstimator
 
@@ -25,57 +25,24 @@ sh.setLevel(logging.DEBUG)
 logger.addHandler(sh)
 
 
-class EnsembleBagging:
-    def __init__(self, file_path, test_size=342):
-        """
-        Initializes data required by bagging ensemble
-        :param file_path: path to processed dataset
-        :param test_size: last test_size hours will be treated as test set
-        """
-        # Read data frame
-        self.series = pd.read_csv(
-            file_path,
-            header=None,  # contains no header
-            index_col=0,  # set datetime column as index
-            names=['datetime', 'requests'],  # name the columns
-            converters={'datetime':  # custom datetime parser
-                            lambda x: pd.to_datetime(x, format='%Y-%m-%d %H:%M:%S')},
-            squeeze=True,  # convert to Series
-            dtype={'requests': np.float64},  # https://git.io/vdbyk
-        )
-
-        # Save test_size
-        if test_size <= 0:
-            raise ValueError
-        self.test_size = test_size
-
-        # exclude test data
-        self.eval_series = self.series[:-test_size]
-        self.test_series = self.series[-test_size:].copy()
-
-        # be sure
-        assert len(self.test_series) == test_size
-        assert len(self.test_series) + len(self.eval_series) == len(self.series)
+class EnsembleBagging(_BaseEnsemble):
+    # bagging estimator of each algorithm
+    ESTIMATORS = collections.OrderedDict([
+        ('naive', NaiveBaggingEstimator),
+        ('ar', ArBaggingEstimator),
+        ('arma', ArmaBaggingEstimator),
+        ('arima', ArimaBaggingEstimator),
+        ('ets', EtsBaggingEstimator),
+    ])
+
+    # bagging samples are ordered and spaced by datetime
+    PARSE_DATES = True
 
     def run_test(self, test_algo, result_path):
         # assign estimator
-        if test_algo == 'naive':
-            logger.warning("Running Naive Bagging on Test Data")
-            estimator = NaiveBaggingEstimator()
-        elif test_algo == 'ar':
-            logger.warning("Running AR Bagging on Test Data")
-            estimator = ArBaggingEstimator()
-        elif test_algo == 'arma':
-            logger.warning("Running ARMA Bagging on Test Data")
-            estimator = ArmaBaggingEstimator()
-        elif test_algo == 'arima':
-            logger.warning("Running ARIMA Bagging on Test Data")
-            estimator = ArimaBaggingEstimator()
-        elif test_algo == 'ets':
-            logger.warning("Running ETS Bagging on Test Data")
-            estimator = EtsBaggingEstimator()
-        else:
-            assert False
+        assert test_algo in self.ESTIMATORS
+        logger.warning("Running %s Bagging on Test Data" % test_algo)
+        estimator = self.ESTIMATORS[test_algo]()
 
         # Makes eval series available for prediction
         estimator.fit(self.eval_series)
@@ -83,10 +50,8 @@ class EnsembleBagging:
         # Run step-by-step prediction
         results = estimator.predict(self.test_series)
 
-        df_data = collections.OrderedDict()
-        df_data['Observation'] = self.test_series
-        df_data['Prediction'] = results
-        pd.DataFrame(df_data, columns=df_data.keys()) \
+        pd.concat([self.test_series.rename('Observation').reset_index(drop=True),
+                   pd.Series(results, name='Prediction')], axis=1) \
             .to_csv(result_path, index=False, na_rep='NaN')
 
 
@@ -7,14 +7,16 @@ import sys
 
 import numpy as np
 import pandas as pd
+from _base import _BaseEnsemble
 from estimators import NaiveEstimator, ArEstimator, \
     ArmaEstimator, ArimaEstimator, EtsEstimator
-from sklearn.model_selection import cross_val_score, TimeSeriesSplit
 
 # Parse arguments
 parser = argparse.ArgumentParser()
 parser.add_argument('data', type=str, help='Path to processed dataset')
 parser.add_argument('result_path', type=str, help='Destination to save result')
+parser.add_argument('--warm_start', action='store_true',
+                    help='Re-apply model estimated on first test step to subsequent steps')
 args = parser.parse_args()
 
 # Initialize logger
@@ -25,57 +27,71 @@ sh.setLevel(logging.DEBUG)
 logger.addHandler(sh)
 
 
-class EnsembleCrossValidation:
+class EnsembleCrossValidation(_BaseEnsemble):
+    # candidate algorithms, cheapest first
+    ESTIMATORS = collections.OrderedDict([
+        ('naive', NaiveEstimator),
+        ('ar', ArEstimator),
+        ('arma', ArmaEstimator),
+        ('arima', ArimaEstimator),
+        ('ets', EtsEstimator),
+    ])
+
+    # joblib backend used for folds of each candidate (loky if not listed);
+    # R holds the GIL and is not thread-safe, so R-backed candidates need
+    # processes, while naive forecasts are so cheap that starting workers
+    # and pickling the series for them would outweigh the work itself
+    BACKENDS = {'naive': 'threading'}
+
+    # least gap to the leader's screening score, relative to that score,
+    # for a candidate to be dropped
+    SCREEN_MARGIN = 0.05
+
     def __init__(self, file_path, test_size=342):
         """
         Initializes data required by cross validation ensemble
         :param file_path: path to processed dataset
         :param test_size: last test_size hours will be treated as test set
         """
-        # Read data frame
-        self.series = pd.read_csv(
-            file_path,
-            header=None,  # contains no header
-            index_col=0,  # set datetime column as index
-            names=['datetime', 'requests'],  # name the columns
-            converters={'datetime':  # custom datetime parser
-                            lambda x: pd.to_datetime(x, format='%Y-%m-%d %H:%M:%S')},
-            squeeze=True,  # convert to Series
-            dtype={'requests': np.float64},  # https://git.io/vdbyk
-        )
-
-        # Save test_size
-        if test_size <= 0:
-            raise ValueError
-        self.test_size = test_size
-
-        # exclude test data
-        self.eval_series = self.series[:-test_size]
-        self.test_series = self.series[-test_size:].copy()
-
-        # be sure
-        assert len(self.test_series) == test_size
-        assert len(self.test_series) + len(self.eval_series) == len(self.series)
+        super().__init__(file_path, test_size)
 
         logger.warning("Deciding best algorithm...")
 
+        # Fold indices are computed once, so that every
+        # candidate is scored on exactly the same folds
+        self.cv_splits = self._load_splits()
+
+        # Successive halving: every candidate is first screened on the most
+        # recent folds, and candidates trailing the leader by more than
+        # twice the pooled spread of both fold scores (and by more than
+        # SCREEN_MARGIN) are not scored any further
+        screen_splits, rest_splits = self.cv_splits[-3:], self.cv_splits[:-3]
+
+        logger.warning("Screening %s Algorithms" % ", ".join(self.ESTIMATORS))
+        fold_scores = self._score_candidates(list(self.ESTIMATORS), screen_splits)
+
+        # a zero observation makes a score inf (or NaN), rank those last
+        means = dict((name, scores.mean()) for name, scores in fold_scores.items())
+        leader = min(means, key=lambda name: means[name] if np.isfinite(means[name]) else np.inf)
+        if np.isfinite(means[leader]):
+            survivors = []
+            for name, scores in fold_scores.items():
+                if not np.isfinite(means[name]):
+                    continue  # # trails a finite leader
+                spread = np.sqrt((np.var(fold_scores[leader]) + np.var(scores)) / 2)
+                margin = max(2 * spread, self.SCREEN_MARGIN * abs(means[leader]))
+                if name == leader or means[name] <= means[leader] + margin:
+                    survivors.append(name)
+        else:
+            # screening says nothing useful, keep every candidate
+            survivors = list(fold_scores)
+
+        logger.warning("Scoring %s Algorithms" % ", ".join(survivors))
+        for name, scores in self._score_candidates(survivors, rest_splits).items():
+            fold_scores[name] = np.concatenate([scores, fold_scores[name]])
+
         # Calculate mean score of 10-fold evaluation
-        score = dict()
-        logger.warning("Scoring Naive Algorithm")
-        score['naive'] = cross_val_score(NaiveEstimator(), self.eval_series,
-                                         cv=TimeSeriesSplit(n_splits=10).split(self.eval_series), verbose=3).mean()
-        logger.warning("Scoring AR Algorithm")
-        score['ar'] = cross_val_score(ArEstimator(), self.eval_series,
-                                      cv=TimeSeriesSplit(n_splits=10).split(self.eval_series), verbose=3).mean()
-        logger.warning("Scoring ARMA Algorithm")
-        score['arma'] = cross_val_score(ArmaEstimator(), self.eval_series,
-                                        cv=TimeSeriesSplit(n_splits=10).split(self.eval_series), verbose=3).mean()
-        logger.warning("Scoring ARIMA Algorithm")
-        score['arima'] = cross_val_score(ArimaEstimator(), self.eval_series,
-                                         cv=TimeSeriesSplit(n_splits=10).split(self.eval_series), verbose=3).mean()
-        logger.warning("Scoring ETS Algorithm")
-        score['ets'] = cross_val_score(EtsEstimator(), self.eval_series,
-                                       cv=TimeSeriesSplit(n_splits=10).split(self.eval_series), verbose=3).mean()
+        score = {name: fold_scores[name].mean() for name in survivors}
 
         logger.warning(score)
 
@@ -84,36 +100,22 @@ class EnsembleCrossValidation:
 
         logger.warning("Best Algorithm: %s" % self.best_algo)
 
-    def run_test(self, result_path):
+    def run_test(self, result_path, warm_start=False):
         # assign estimator
-        if self.best_algo == 'naive':
-            logger.warning("Running Naive Algorithm on Test Data")
-            estimator = NaiveEstimator()
-        elif self.best_algo == 'ar':
-            logger.warning("Running AR Algorithm on Test Data")
-            estimator = ArEstimator()
-        elif self.best_algo == 'arma':
-            logger.warning("Running ARMA Algorithm on Test Data")
-            estimator = ArmaEstimator()
-        elif self.best_algo == 'arima':
-            logger.warning("Running ARIMA Algorithm on Test Data")
-            estimator = ArimaEstimator()
-        elif self.best_algo == 'ets':
-            logger.warning("Running ETS Algorithm on Test Data")
-            estimator = EtsEstimator()
-        else:
-            assert False
+        logger.warning("Running %s Algorithm on Test Data" % self.best_algo)
+        estimator = self.ESTIMATORS[self.best_algo](n_jobs=-1, warm_start=warm_start)
 
         # Makes eval series available for prediction
+        # fit only memorizes the series (models are estimated per step
+        # in predict), so estimators from cross validation are not reused:
+        # they memorized a prefix of eval series and would miss the last fold
         estimator.fit(self.eval_series)
 
         # Run step-by-step prediction
         results = estimator.predict(self.test_series)
 
-        df_data = collections.OrderedDict()
-        df_data['Observation'] = self.test_series
-        df_data['Prediction'] = results
-        pd.DataFrame(df_data, columns=df_data.keys()) \
+        pd.concat([self.test_series.rename('Observation').reset_index(drop=True),
+                   pd.Series(results, name='Prediction')], axis=1) \
             .to_csv(result_path, index=False, na_rep='NaN')
 
 
@@ -124,7 +126,8 @@ def main():
     algo = EnsembleCrossValidation(file_path=args.data, test_size=240)
 
     # Run test
-    algo.run_test(result_path=args.result_path)
+    algo.run_test(result_path=args.result_path,
+                  warm_start=args.warm_start)
 
     logger.warning("Stopping Ensemble Cross Validation")
 
@@ -5,9 +5,42 @@ import lightgbm as lgb
 import numpy as np
 import pandas as pd
 import tqdm
+from joblib import Parallel, delayed
 from sklearn.base import BaseEstimator
 
 
+def online_predict(forecast_fn, history, X, clip, n_jobs=1, backend=None):
+    """
+    Forecasts every observation in X one step ahead
+    :param forecast_fn: one of ForecastAlgorithms' *_forecast methods
+    :param history: pandas Series memorized during fit
+    :param X: pandas Series holding the true observations
+    :param clip: number of past samples the algorithm looks at
+    :param n_jobs: number of workers forecasting steps concurrently
+    :param backend: joblib backend of the workers, loky if None
+    :return: forecasts, one per observation in X
+    """
+    # training + elapsed, as one float64 array;
+    # each step then only takes an O(1) view of it
+    start = len(history)
+    data = np.concatenate([
+        np.asarray(history, dtype=np.float64),
+        np.asarray(X, dtype=np.float64),
+    ])
+
+    # every step sees only true observations, never earlier forecasts,
+    # so the steps are independent of each other
+    # first prediction is done on already memorized data,
+    # subsequent predictions are online
+    # joblib reports progress, as tasks finish rather than as they are sent
+    forecasts = Parallel(n_jobs=n_jobs, backend=backend, verbose=3)(
+        delayed(forecast_fn)(data[max(0, start + i - clip):start + i])
+        for i in range(len(X))
+    )
+    return np.fromiter((forecast[-1] for forecast in forecasts),
+                       dtype=np.float64, count=len(X))
+
+
 class AverageEstimator(BaseEstimator):
     def __init__(self):
         self.algo = forecast.ForecastAlgorithms(samples=500)
@@ -53,27 +86,25 @@ class AverageEstimator(BaseEstimator):
 
 
 class NaiveEstimator(BaseEstimator):
-    def __init__(self):
-        self.algo = forecast.ForecastAlgorithms(samples=500)
+    def __init__(self, n_jobs=1, warm_start=False):
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.algo = forecast.ForecastAlgorithms(samples=500, warm_start=warm_start)
 
     def fit(self, X):
         self.fit_ = X  # # memorize data for prediction
+        self.algo.fits.clear()  # # re-estimate on new data
         return self
 
     def predict(self, X):
         # X here holds the true observations
-
-        # first prediction is done on already memorized data
-        predictions = np.array([
-            self.algo.naive_forecast(self.fit_)
-        ])
-
-        # subsequent predictions are online
-        for i in tqdm.tqdm(range(1, len(X))):
-            data = pd.concat([self.fit_, X[:i]])  # # training + elapsed
-            predictions = np.append(predictions,
-                                    self.algo.naive_forecast(data))
-        return predictions
+        # warm started models carry over from step to step,
+        # so steps have to run one after the other
+        # naive forecasts are too cheap to be worth a worker process
+        return online_predict(self.algo.naive_forecast, self.fit_, X,
+                              clip=self.algo.clip,
+                              n_jobs=1 if self.warm_start else self.n_jobs,
+                              backend='threading')
 
     def score(self, X):
         predictions = self.predict(X)
@@ -85,27 +116,23 @@ class NaiveEstimator(BaseEstimator):
 
 
 class ArEstimator(BaseEstimator):
-    def __init__(self):
-        self.algo = forecast.ForecastAlgorithms(samples=500)
+    def __init__(self, n_jobs=1, warm_start=False):
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.algo = forecast.ForecastAlgorithms(samples=500, warm_start=warm_start)
 
     def fit(self, X):
         self.fit_ = X  # # memorize data for prediction
+        self.algo.fits.clear()  # # re-estimate on new data
         return self
 
     def predict(self, X):
         # X here holds the true observations
-
-        # first prediction is done on already memorized data
-        predictions = np.array([
-            self.algo.ar_forecast(self.fit_)
-        ])
-
-        # subsequent predictions are online
-        for i in tqdm.tqdm(range(1, len(X))):
-            data = pd.concat([self.fit_, X[:i]])  # # training + elapsed
-            predictions = np.append(predictions,
-                                    self.algo.ar_forecast(data))
-        return predictions
+        # warm started models carry over from step to step,
+        # so steps have to run one after the other
+        return online_predict(self.algo.ar_forecast, self.fit_, X,
+                              clip=self.algo.clip,
+                              n_jobs=1 if self.warm_start else self.n_jobs)
 
     def score(self, X):
         predictions = self.predict(X)
@@ -117,27 +144,23 @@ class ArEstimator(BaseEstimator):
 
 
 class ArmaEstimator(BaseEstimator):
-    def __init__(self):
-        self.algo = forecast.ForecastAlgorithms(samples=500)
+    def __init__(self, n_jobs=1, warm_start=False):
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.algo = forecast.ForecastAlgorithms(samples=500, warm_start=warm_start)
 
     def fit(self, X):
         self.fit_ = X  # # memorize data for prediction
+        self.algo.fits.clear()  # # re-estimate on new data
         return self
 
     def predict(self, X):
         # X here holds the true observations
-
-        # first prediction is done on already memorized data
-        predictions = np.array([
-            self.algo.arma_forecast(self.fit_)
-        ])
-
-        # subsequent predictions are online
-        for i in tqdm.tqdm(range(1, len(X))):
-            data = pd.concat([self.fit_, X[:i]])  # # training + elapsed
-            predictions = np.append(predictions,
-                                    self.algo.arma_forecast(data))
-        return predictions
+        # warm started models carry over from step to step,
+        # so steps have to run one after the other
+        return online_predict(self.algo.arma_forecast, self.fit_, X,
+                              clip=self.algo.clip,
+                              n_jobs=1 if self.warm_start else self.n_jobs)
 
     def score(self, X):
         predictions = self.predict(X)
@@ -149,27 +172,23 @@ class ArmaEstimator(BaseEstimator):
 
 
 class ArimaEstimator(BaseEstimator):
-    def __init__(self):
-        self.algo = forecast.ForecastAlgorithms(samples=500)
+    def __init__(self, n_jobs=1, warm_start=False):
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.algo = forecast.ForecastAlgorithms(samples=500, warm_start=warm_start)
 
     def fit(self, X):
         self.fit_ = X  # # memorize data for prediction
+        self.algo.fits.clear()  # # re-estimate on new data
         return self
 
     def predict(self, X):
         # X here holds the true observations
-
-        # first prediction is done on already memorized data
-        predictions = np.array([
-            self.algo.arima_forecast(self.fit_)
-        ])
-
-        # subsequent predictions are online
-        for i in tqdm.tqdm(range(1, len(X))):
-            data = pd.concat([self.fit_, X[:i]])  # # training + elapsed
-            predictions = np.append(predictions,
-                                    self.algo.arima_forecast(data))
-        return predictions
+        # warm started models carry over from step to step,
+        # so steps have to run one after the other
+        return online_predict(self.algo.arima_forecast, self.fit_, X,
+                              clip=self.algo.clip,
+                              n_jobs=1 if self.warm_start else self.n_jobs)
 
     def score(self, X):
         predictions = self.predict(X)
@@ -181,27 +200,23 @@ class ArimaEstimator(BaseEstimator):
 
 
 class EtsEstimator(BaseEstimator):
-    def __init__(self):
-        self.algo = forecast.ForecastAlgorithms(samples=500)
+    def __init__(self, n_jobs=1, warm_start=False):
+        self.n_jobs = n_jobs
+        self.warm_start = warm_start
+        self.algo = forecast.ForecastAlgorithms(samples=500, warm_start=warm_start)
 
     def fit(self, X):
         self.fit_ = X  # # memorize data for prediction
+        self.algo.fits.clear()  # # re-estimate on new data
         return self
 
     def predict(self, X):
         # X here holds the true observations
-
-        # first prediction is done on already memorized data
-        predictions = np.array([
-            self.algo.ets_forecast(self.fit_)
-        ])
-
-        # subsequent predictions are online
-        for i in tqdm.tqdm(range(1, len(X))):
-            data = pd.concat([self.fit_, X[:i]])  # # training + elapsed
-            predictions = np.append(predictions,
-                                    self.algo.ets_forecast(data))
-        return predictions
+        # warm started models carry over from step to step,
+        # so steps have to run one after the other
+        return online_predict(self.algo.ets_forecast, self.fit_, X,
+                              clip=self.algo.clip,
+                              n_jobs=1 if self.warm_start else self.n_jobs)
 
     def score(self, X):
         predictions = self.predict(X)